@@ -19,17 +19,15 @@
 # pylint: disable=missing-docstring
 
 import argparse
-import configparser
-import io
+import datetime
 import logging
-import os
 import pathlib
 import subprocess
 import sys
 
+from . import build
 from . import const
 from . import model
-from . import render
 
 argparser = argparse.ArgumentParser()  # pylint: disable=invalid-name
 
@@ -77,64 +75,18 @@ def main(args=None):
     if not args.config:
         args.config = [const.DEFAULT_CONFIG]
 
-    config = model.get_configparser()
-
-    for path in args.config:
-        with path.open() as file:
-            config.read_file(file)
-
-    config.read_file(args.file)
+    draft = args.file.read()
+    today = datetime.date.today()
+    config = model.load_config(args.config, draft, args.option,
+        today=today, source=args.file.name)
     state = model.State()
 
-    for option in args.option:
-        option, value = option.split('=', 1)
-        section, option = option.split('/', 1)
-
-        try:
-            config.add_section(section)
-        except configparser.DuplicateSectionError:
-            pass
-
-        config.set(section, option, value)
-
-    invoice = model.Invoice(config, state)
-
-    templates = [const.USER_TEMPLATE, const.DEFAULT_TEMPLATE]
-    if args.template is not None:
-        templates.insert(0, args.template)
-
-    env = render.get_jinja2_environment(invoice.lang)
-    template = env.select_template(templates)
-    # pylint: disable=no-member
-    filepath = (args.output / invoice.stem
-        ).with_suffix(os.path.splitext(template.name)[1])
-    texdata = template.render(invoice=invoice, args=args, config=config)
-    # pylint: enable=no-member
-
-    logging.info('writing %s', filepath)
-    with open(str(filepath), 'x') as file:
-        file.write(texdata)
-
-    logging.info('compiling')
     try:
-        subprocess.check_call(
-            ['context', *const.CONTEXTOPTS, filepath.name],
-            cwd=str(filepath.parent))
-
+        build.build(config, state, args, draft, today, source=args.file.name)
     except subprocess.CalledProcessError:
         logging.exception('context failed')
         return 1
 
-    else:
-        state.save()
-
-    finally:
-        for suffix in ('.tuc', '.log'):
-            try:
-                filepath.with_suffix(suffix).unlink()
-            except OSError:
-                pass
-
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,81 @@
+#
+# invoice -- simple invoicing script
+# Copyright (C) 2015-2018 Wojtek Porczyk <woju@invisiblethingslab.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''Generating an invoice: rendering the template and compiling it'''
+
+import logging as _logging
+import os as _os
+import subprocess as _subprocess
+
+from . import const as _const
+from . import depend as _depend
+from . import model as _model
+from . import render as _render
+
+_log = _logging.getLogger()
+
+def build(config, number_state, args, draft, today, *,
+        source='<draft>', overwrite=False, rates=None):
+    '''Generate the invoice and record its inputs. Return path to the result.
+
+    *config* is from :func:`invoice.model.load_config`, *args* has the same
+    attributes as parsed by :mod:`invoice.__main__`, *draft* and *today* are
+    what the config was loaded with. *number_state* is saved after success.
+    The .tex file is overwritten only if *overwrite* is true. *rates* are
+    passed to :class:`invoice.model.Invoice`.
+
+    Raises :class:`subprocess.CalledProcessError` if ConTeXt fails.
+    '''
+    # pylint: disable=too-many-arguments
+    invoice = _model.Invoice(config, number_state, rates=rates)
+
+    templates = [_const.USER_TEMPLATE, _const.DEFAULT_TEMPLATE]
+    if args.template is not None:
+        templates.insert(0, args.template)
+
+    env = _render.get_jinja2_environment(invoice.lang)
+    template = env.select_template(templates)
+    # pylint: disable=no-member
+    filepath = (args.output / invoice.stem
+        ).with_suffix(_os.path.splitext(template.name)[1])
+    texdata = template.render(invoice=invoice, args=args, config=config)
+    # pylint: enable=no-member
+
+    _log.info('writing %s', filepath)
+    with open(str(filepath), 'w' if overwrite else 'x') as file:
+        file.write(texdata)
+
+    _log.info('compiling')
+    try:
+        _subprocess.check_call(
+            ['context', *_const.CONTEXTOPTS, filepath.name],
+            cwd=str(filepath.parent))
+
+    finally:
+        for suffix in ('.tuc', '.log'):
+            try:
+                filepath.with_suffix(suffix).unlink()
+            except OSError:
+                pass
+
+    number_state.save()
+    _depend.Record.from_invoice(invoice, env, args, draft, today,
+        source=source).save(filepath.with_suffix(_const.DEPENDS_SUFFIX))
+
+    return filepath
@@ -42,12 +42,14 @@ TEMPLATEPATHS = [prefix / 'templates' for prefix in _PREFIXEN]
 #: path to a directory where invoices will be generated
 GETTEXTPATH = _PACKAGEPATH / 'locale'
 
+#: paths searched by ConTeXt for included files
+CONTEXTPATHS = [prefix / 'context' for prefix in _PREFIXEN]
+
 #: options passed to ConTeXt
 CONTEXTOPTS = [
     '--batch',
     '--noconsole',
-    '--path={}'.format(','.join(str(prefix / 'context')
-        for prefix in _PREFIXEN)),
+    '--path={}'.format(','.join(map(str, CONTEXTPATHS))),
 ]
 
 #: configuration file
@@ -56,6 +58,9 @@ DEFAULT_CONFIG = CONFIGPATH / 'invoice.cfg'
 #: state file
 DEFAULT_STATE = CONFIGPATH / 'state'
 
+#: suffix of the file recording what the invoice was generated from
+DEPENDS_SUFFIX = '.dep'
+
 #: the template
 USER_TEMPLATE = 'invoice.tex'
 
@@ -0,0 +1,160 @@
+#
+# invoice -- simple invoicing script
+# Copyright (C) 2015-2018 Wojtek Porczyk <woju@invisiblethingslab.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+'''Dependency tracking: what was each invoice generated from'''
+
+import decimal as _decimal
+import functools as _functools
+import hashlib as _hashlib
+import json as _json
+import os as _os
+import pathlib as _pathlib
+
+from . import const as _const
+from . import model as _model
+from . import render as _render
+
+#: version of the record format; records of other versions are outdated
+VERSION = 1
+
+@_functools.lru_cache(maxsize=None)
+def digest_file(path):
+    '''SHA-256 of the file contents, computed once per process'''
+    with open(str(path), 'rb') as file:
+        return _hashlib.sha256(file.read()).hexdigest()
+
+def digest_section(config, section):
+    '''SHA-256 of raw values in the config section. None if no such section.'''
+    if not config.has_section(section):
+        return None
+    return _hashlib.sha256(_json.dumps(
+        sorted(config.items(section, raw=True))).encode()).hexdigest()
+
+@_functools.lru_cache(maxsize=None)
+def _digest_contextpaths():
+    # we don't know which files ConTeXt did read, so take all of them
+    digests = {}
+    for contextpath in _const.CONTEXTPATHS:
+        for dirpath, _, filenames in _os.walk(str(contextpath)):
+            for filename in filenames:
+                path = _os.path.join(dirpath, filename)
+                digests[path] = digest_file(path)
+    return digests
+
+def get_inputs(config, sections, templates):
+    '''Get digests of everything the invoice depends on
+
+    *sections* are names of config sections and *templates* are names of
+    templates which were looked up while generating.
+    '''
+    lang = config.get(_model.Invoice.section, 'lang')
+    return {
+        'sections': {section: digest_section(config, section)
+            for section in sorted(sections)},
+        'lines': _model.Invoice.get_line_sections(config),
+        'templates': {name: _digest_template(name) for name in templates},
+        'context': dict(_digest_contextpaths()),
+        'catalogs': {path: digest_file(path)
+            for path in _render.find_catalogs(lang)},
+    }
+
+def _digest_template(name):
+    path = _render.find_template(name)
+    if path is None:
+        return None
+    return {'path': path, 'digest': digest_file(path)}
+
+
+class Record(dict):
+    '''What the invoice was generated from. Kept next to the invoice.'''
+
+    @classmethod
+    def from_invoice(cls, invoice, env, args, draft, today,
+            source='<draft>'):
+        '''Record inputs of just generated invoice
+
+        *env* is the jinja2 environment the invoice was rendered with,
+        *args* has the same attributes as parsed by :mod:`invoice.__main__`.
+        '''
+        # pylint: disable=too-many-arguments
+        self = cls(
+            version=VERSION,
+            number=invoice.number,
+            today=today.isoformat(),
+            draft={'source': source, 'text': draft},
+            config=[_os.path.abspath(str(path)) for path in args.config],
+            option=list(args.option),
+            template=args.template,
+            currency_rate=None,
+            inputs=get_inputs(invoice.config,
+                invoice.config.used_sections, env.loader.names),
+        )
+
+        if invoice.is_foreign_currency:
+            self['currency_rate'] = {
+                'currency': invoice.currency,
+                'issued': invoice.issued.isoformat(),
+                'rate': str(invoice.currency_rate),
+                'date': invoice.currency_rate_date.isoformat(),
+            }
+
+        return self
+
+    @classmethod
+    def load(cls, path):
+        '''Load the record from file'''
+        with open(str(path)) as file:
+            return cls(_json.load(file))
+
+    def save(self, path):
+        '''Save the record to file, atomically'''
+        tmppath = '{}.tmp'.format(path)
+        with open(tmppath, 'w') as file:
+            _json.dump(self, file, indent=1, sort_keys=True)
+        _os.replace(tmppath, str(path))
+
+    today = property(lambda self: _model.date_t(self['today']))
+
+    def get_config(self):
+        '''Read the config again, like it was read for the invoice'''
+        return _model.load_config(
+            [_pathlib.Path(path) for path in self['config']],
+            self['draft']['text'],
+            self['option'],
+            today=self.today,
+            source=self['draft']['source'])
+
+    def get_rates(self):
+        '''Get exchange rate used for the invoice, in format of
+        :attr:`invoice.model.Invoice.rates`'''
+        if self['currency_rate'] is None:
+            return {}
+        rate = self['currency_rate']
+        return {
+            (rate['currency'], _model.date_t(rate['issued'])):
+                (_decimal.Decimal(rate['rate']), _model.date_t(rate['date'])),
+        }
+
+    def is_outdated(self, config):
+        '''Check if any of inputs changed since the invoice was generated
+
+        *config* should be from :meth:`get_config`.
+        '''
+        return (self.get('version') != VERSION
+            or self['inputs'] != get_inputs(config,
+                self['inputs']['sections'], self['inputs']['templates']))
@@ -22,6 +22,7 @@ import configparser as _configparser
 import datetime as _datetime
 import decimal as _decimal
 import fcntl as _fcntl
+import functools as _functools
 import json as _json
 import logging as _logging
 import math as _math
@@ -34,12 +35,17 @@ from . import const as _const
 
 _log = _logging.getLogger()
 
-def date_t(date):
-    '''Parses dates from draft for configparser'''
+def date_t(date, today=None):
+    '''Parses dates from draft for configparser
+
+    Special values are relative to *today* (default: the real today).
+    '''
+    if today is None:
+        today = _datetime.date.today()
     if date == 'today':
-        return _datetime.date.today()
+        return today
     if date == 'last-month':
-        return _datetime.date.today().replace(day=1)-_datetime.timedelta(days=1)
+        return today.replace(day=1) - _datetime.timedelta(days=1)
     return _datetime.datetime.strptime(date, '%Y-%m-%d').date()
 
 _re_maybe_comma = _re.compile(r'[, ]+')
@@ -48,9 +54,32 @@ def set_t(value):
     return set(_re_maybe_comma.split(value))
 
 
-def get_configparser():
-    '''Initialise a ConfigParser'''
-    return _configparser.ConfigParser(
+class ConfigParser(_configparser.ConfigParser):
+    '''A ConfigParser which remembers which sections were looked into'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.used_sections = set()
+
+    # pylint: disable=arguments-differ
+    def get(self, section, option, **kwargs):
+        self.used_sections.add(section)
+        return super().get(section, option, **kwargs)
+
+    def has_option(self, section, option):
+        self.used_sections.add(section)
+        return super().has_option(section, option)
+
+    def options(self, section):
+        self.used_sections.add(section)
+        return super().options(section)
+
+
+def get_configparser(today=None):
+    '''Initialise a ConfigParser
+
+    *today* is passed to :func:`date_t`.
+    '''
+    return ConfigParser(
         comment_prefixes='#;',
         inline_comment_prefixes='#',
         default_section=None,
@@ -58,10 +87,37 @@ def get_configparser():
         converters={
             'decimal': _decimal.Decimal,
             'path': _const.CONFIGPATH.__truediv__,
-            'date': date_t,
+            'date': _functools.partial(date_t, today=today),
             'set': set_t,
         })
 
+def load_config(paths, draft, options=(), today=None, source='<draft>'):
+    '''Read config files, then the draft, then directly set options
+
+    *draft* is the text of the draft, *options* are strings like
+    ``SECTION/OPTION=VALUE``, *today* is passed to :func:`get_configparser`.
+    '''
+    config = get_configparser(today=today)
+
+    for path in paths:
+        with path.open() as file:
+            config.read_file(file)
+
+    config.read_string(draft, source=source)
+
+    for option in options:
+        option, value = option.split('=', 1)
+        section, option = option.split('/', 1)
+
+        try:
+            config.add_section(section)
+        except _configparser.DuplicateSectionError:
+            pass
+
+        config.set(section, option, value)
+
+    return config
+
 
 class Customer:
     '''A customer from config'''
@@ -195,9 +251,19 @@ class Invoice:
     def _sort_key_line(line):
         return tuple(int(s) if s.isdigit() else s for s in line.split('.'))
 
-    def __init__(self, config, number_state):
+    @classmethod
+    def get_line_sections(cls, config):
+        '''Names of sections which are lines of the invoice, in order'''
+        return sorted(
+            (s for s in config.sections() if s.startswith('line.')),
+            key=cls._sort_key_line)
+
+    def __init__(self, config, number_state, rates=None):
         self.config = config
 
+        #: cache of exchange rates: (currency, issued) -> (rate, date)
+        self.rates = {} if rates is None else rates
+
         self.lang = config.get(self.section, 'lang')
         self.currency = config.get(self.section, 'currency')
         self.issued = config.getdate(self.section, 'issued')
@@ -216,9 +282,7 @@ class Invoice:
         except _configparser.NoOptionError:
             self.number = number_state.get_number(self.issued)
 
-        for section in sorted(
-                (s for s in config.sections() if s.startswith('line.')),
-                key=self._sort_key_line):
+        for section in self.get_line_sections(config):
             self.lines.append(Line(config, section, currency=self.currency))
 
         self.currency_rate = None
@@ -229,6 +293,13 @@ class Invoice:
 
     def _get_currency_rate(self):
         '''Get exchange rate for this invoice'''
+        try:
+            self.currency_rate, self.currency_rate_date = self.rates[
+                self.currency, self.issued]
+            return
+        except KeyError:
+            pass
+
         index = _urllib_request.urlopen(
             _const.NBP_URL_INDEX).read().decode('iso-8859-2')
         match = None
@@ -250,6 +321,8 @@ class Invoice:
 
         self.currency_rate = _decimal.Decimal(result[0].text.replace(',', '.'))
         self.currency_rate_date = date
+        self.rates[self.currency, self.issued] = (
+            self.currency_rate, self.currency_rate_date)
 
     netto = property(lambda self: sum(line.netto for line in self.lines))
     brutto = property(lambda self: sum(line.brutto for line in self.lines))
@@ -315,3 +388,26 @@ class State(dict):
             year = year.year
         self[year] += 1
         return '{}/{:02d}'.format(year, self[year])
+
+
+class ArchivedNumber:
+    '''Stand-in for State when regenerating an invoice which has a number.
+
+    Nothing is locked or saved, so many invoices can be regenerated at once.
+    '''
+    def __init__(self, number):
+        self.number = number
+
+    def save(self):
+        '''Do nothing, there is nothing to remember'''
+
+    def register_number(self, number):
+        '''Warn if the number differs from the archived one'''
+        if number != self.number:
+            _log.warning('warning: number %s changed to %s',
+                self.number, number)
+
+    def get_number(self, year):
+        '''Get the archived number'''
+        # pylint: disable=unused-argument
+        return self.number
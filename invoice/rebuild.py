@@ -0,0 +1,142 @@
+#
+# invoice -- simple invoicing script
+# Copyright (C) 2015-2018 Wojtek Porczyk <woju@invisiblethingslab.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+
+'''Regenerate archived invoices which are out of date, like make(1).
+
+Each generated invoice has a record of its inputs (see
+:mod:`invoice.depend`). An invoice is regenerated, with its original number
+and dates, if its PDF is missing or if any of config sections, templates,
+ConTeXt files or message catalogs changed since it was generated.
+'''
+
+# pylint: disable=missing-docstring
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import pathlib
+import sys
+
+from . import build
+from . import const
+from . import depend
+from . import model
+
+argparser = argparse.ArgumentParser(  # pylint: disable=invalid-name
+    description='regenerate out of date invoices')
+
+argparser.add_argument('--jobs', '-j', metavar='N',
+    type=int,
+    help='number of invoices generated at once (default: number of CPUs)')
+
+argparser.add_argument('--always-make', '-B',
+    action='store_true', default=False,
+    help='regenerate all invoices, even if up to date')
+
+argparser.add_argument('--dry-run', '-n',
+    action='store_true', default=False,
+    help='only print which invoices would be regenerated')
+
+argparser.add_argument('--verbose', '-v',
+    dest='loglevel',
+    action='append_const', const=-10,
+    help='increase verbosity')
+
+argparser.add_argument('--quiet', '-q',
+    dest='loglevel',
+    action='append_const', const=+10,
+    help='decrease verbosity')
+
+argparser.add_argument('paths', metavar='PATH',
+    nargs='*',
+    type=pathlib.Path,
+    help='directory with invoices, or a {} file (default: {!s})'.format(
+        const.DEPENDS_SUFFIX, const.INVOICEPATH))
+
+argparser.set_defaults(
+    jobs=os.cpu_count(),
+    loglevel=[logging.WARNING],
+)
+
+def find_records(paths):
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.glob('*' + const.DEPENDS_SUFFIX))
+        else:
+            yield path
+
+def rebuild(path, args, rates):
+    '''Regenerate the invoice if needed. Return True if it was outdated.'''
+    record = depend.Record.load(path)
+    pdfpath = path.with_suffix('.pdf')
+
+    if not (args.always_make or not pdfpath.exists()
+            or record.is_outdated(record.get_config())):
+        logging.debug('%s is up to date', pdfpath)
+        return False
+
+    if args.dry_run:
+        print(pdfpath)
+        return True
+
+    logging.info('regenerating %s', pdfpath)
+    rates.update(record.get_rates())
+    build.build(record.get_config(),
+        model.ArchivedNumber(record['number']),
+        argparse.Namespace(
+            config=[pathlib.Path(config) for config in record['config']],
+            option=record['option'],
+            output=path.parent,
+            template=record['template'],
+            file=None,
+            loglevel=args.loglevel),
+        record['draft']['text'],
+        record.today,
+        source=record['draft']['source'],
+        overwrite=True,
+        rates=rates)
+    return True
+
+def main(args=None):
+    args = argparser.parse_args(args)
+    logging.basicConfig(format='%(message)s', level=sum(args.loglevel))
+    if not args.paths:
+        args.paths = [const.INVOICEPATH]
+
+    # exchange rates are shared, so they are downloaded only once
+    rates = {}
+    failed = 0
+
+    # most of the time is spent waiting for ConTeXt, threads are enough
+    with concurrent.futures.ThreadPoolExecutor(args.jobs) as executor:
+        futures = {executor.submit(rebuild, path, args, rates): path
+            for path in find_records(args.paths)}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception('regenerating %s failed', futures[future])
+                failed += 1
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
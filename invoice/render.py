@@ -19,6 +19,7 @@
 '''Rendering facilities, jinja etc.'''
 
 import gettext as _gettext
+import os as _os
 
 import jinja2 as _jinja2
 import babel.numbers as _bnumbers
@@ -42,12 +43,41 @@ def assertfunc(value):
     '''Global for jinja2: assert'''
     assert value
 
+class RecordingLoader(_jinja2.FileSystemLoader):
+    '''FileSystemLoader which remembers names of templates looked up,
+    including those which were not found.'''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.names = []
+
+    def get_source(self, environment, template):
+        if template not in self.names:
+            self.names.append(template)
+        return super().get_source(environment, template)
+
+def find_template(name):
+    '''Find path to the template, like the loader does. None if not found.'''
+    pieces = _jinja2.loaders.split_template_path(name)
+    for searchpath in _const.TEMPLATEPATHS:
+        path = _os.path.join(str(searchpath), *pieces)
+        if _os.path.isfile(path):
+            return path
+    return None
+
+def find_catalogs(lang):
+    '''Get list of paths to message catalogs used for the language'''
+    return _gettext.find('invoice', str(_const.GETTEXTPATH),
+        languages=[lang], all=True)
+
 def get_jinja2_environment(lang):
-    '''Get configured jinja2 environment'''
+    '''Get configured jinja2 environment
+
+    The loader is :class:`RecordingLoader`.
+    '''
 
     env = _jinja2.Environment(
         extensions=['jinja2.ext.i18n'],
-        loader=_jinja2.FileSystemLoader(list(map(str, _const.TEMPLATEPATHS))))
+        loader=RecordingLoader(list(map(str, _const.TEMPLATEPATHS))))
 
     env.filters['escapetex'] = filter_escapetex
     env.filters['texdate'] = filter_texdate
@@ -24,7 +24,10 @@ setuptools.setup(
         ('share/doc/invoice/examples', [str(path)
             for path in pathlib.Path('Documentation/examples').glob('*')]),
     ],
-    entry_points={'console_scripts': ['invoice = invoice.__main__:main']},
+    entry_points={'console_scripts': [
+        'invoice = invoice.__main__:main',
+        'invoice-rebuild = invoice.rebuild:main',
+    ]},
     cmdclass={
         'compile_catalog': babel.compile_catalog,
         'extract_messages': babel.extract_messages,